@@ -1,7 +1,8 @@
 # backend/auth/middleware.py
 from fastapi import Header, HTTPException, Depends
 from typing import Optional
-from .utils import verify_token
+import hmac
+from .utils import verify_token, ADMIN_TOKEN
 
 async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     """
@@ -49,4 +50,23 @@ async def get_optional_user(authorization: Optional[str] = Header(None)) -> Opti
     else:
         token = authorization
     
-    return verify_token(token)
\ No newline at end of file
+    return verify_token(token)
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guard for ops endpoints - requires X-Admin-Token to match ADMIN_TOKEN
+
+    Usage in routes:
+        @router.get("/endpoint", dependencies=[Depends(require_admin)])
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=404,
+            detail="Not found"
+        )
+    
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin token"
+        )
\ No newline at end of file
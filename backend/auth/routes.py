@@ -1,22 +1,19 @@
 # backend/auth/routes.py
-from fastapi import APIRouter, HTTPException
-from supabase import create_client
+from fastapi import APIRouter, HTTPException, Depends
+from db.client import supabase, execute_async
 import os
 import uuid
 import time
 import hashlib
 from .utils import create_access_token
 from .models import SignupRequest, LoginRequest, PlayerResponse
+from logger.structured import get_logger
+from ratelimit.limiter import limit_by_ip
 
 router = APIRouter()
+logger = get_logger("auth")
 
-# Initialize Supabase
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
-
-@router.post("/signup", response_model=PlayerResponse)
+@router.post("/signup", response_model=PlayerResponse, dependencies=[Depends(limit_by_ip("signup"))])
 async def signup(request: SignupRequest):
     """Create NEW player account"""
     username = request.username.strip().lower()
@@ -31,7 +28,7 @@ async def signup(request: SignupRequest):
     
     try:
         # Check if username exists
-        existing = supabase.table("players").select("id").eq("username", username).execute()
+        existing = await execute_async(supabase.table("players").select("id").eq("username", username))
         if existing.data:
             return PlayerResponse(
                 success=False, 
@@ -51,7 +48,7 @@ async def signup(request: SignupRequest):
             "created_at": "now()"
         }
         
-        result = supabase.table("players").insert(new_player).execute()
+        result = await execute_async(supabase.table("players").insert(new_player))
         
         if not result.data:
             return PlayerResponse(success=False, message="Failed to create player")
@@ -70,19 +67,17 @@ async def signup(request: SignupRequest):
         )
         
     except Exception as e:
-        print(f"Signup error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("signup_failed", username=username)
         return PlayerResponse(success=False, message="Account creation failed")
 
-@router.post("/login", response_model=PlayerResponse)
+@router.post("/login", response_model=PlayerResponse, dependencies=[Depends(limit_by_ip("login"))])
 async def login(request: LoginRequest):
     """Login EXISTING player"""
     username = request.username.strip().lower()
     password = request.password
     
     try:
-        result = supabase.table("players").select("*").eq("username", username).execute()
+        result = await execute_async(supabase.table("players").select("*").eq("username", username))
         if not result.data:
             return PlayerResponse(success=False, message="Account not found")
         
@@ -94,7 +89,7 @@ async def login(request: LoginRequest):
             return PlayerResponse(success=False, message="Invalid password")
         
         # Update last_login
-        supabase.table("players").update({"last_login": "now()"}).eq("id", player["id"]).execute()
+        await execute_async(supabase.table("players").update({"last_login": "now()"}).eq("id", player["id"]))
         
         auth_token = create_access_token(player["id"], username)
         
@@ -108,13 +103,13 @@ async def login(request: LoginRequest):
             username=username
         )
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("login_failed", username=username)
         return PlayerResponse(success=False, message="Login failed")
 
 @router.get("/player/{player_id}")
 async def get_player(player_id: str):
     """Get player profile"""
-    result = supabase.table("players").select("*").eq("id", player_id).execute()
+    result = await execute_async(supabase.table("players").select("*").eq("id", player_id))
     if not result.data:
         raise HTTPException(status_code=404, detail="Player not found")
     return result.data[0]
@@ -130,7 +125,7 @@ async def test_auth():
 @router.post("/test-login")
 async def test_login_endpoint(request: dict):
     """Test endpoint that accepts raw dict"""
-    print(f"Test login received: {request}")
+    logger.debug("test_login_received", request=request)
     return {
         "success": True,
         "message": "Test endpoint works",
@@ -13,6 +13,9 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "CHANGE_THIS_IN_PRODUCTION_USE_LONG_RAN
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
+# Admin/ops endpoints are disabled unless this is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 def hash_password(password: str) -> str:
     """Hash a password for storing"""
     return pwd_context.hash(password)
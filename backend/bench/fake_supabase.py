@@ -0,0 +1,177 @@
+# backend/bench/fake_supabase.py
+import random
+import time
+from typing import Dict, List, Optional
+
+# Columns that are never updated, so they can be hash-indexed safely
+INDEXED_COLUMNS = {
+    "players": ("id", "username"),
+    "friends": ("user_id", "friend_id"),
+    "friend_requests": ("id", "to_user", "from_user")
+}
+
+class FakeResponse:
+    def __init__(self, data: List[Dict]):
+        self.data = data
+        self.count = None
+
+class FakeTable:
+    """Rows for one table plus equality indexes on INDEXED_COLUMNS"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: List[Dict] = []
+        self.indexed = INDEXED_COLUMNS.get(name, ())
+        self.indexes: Dict[str, Dict] = {column: {} for column in self.indexed}
+
+    def insert(self, row: Dict):
+        row = dict(row)
+        if "created_at" in row and row["created_at"] == "now()":
+            row["created_at"] = time.time()
+        self.rows.append(row)
+        for column in self.indexed:
+            self.indexes[column].setdefault(row.get(column), []).append(row)
+        return row
+
+    def find(self, filters: List[tuple]) -> List[Dict]:
+        candidates = None
+        for op, column, value in filters:
+            if op == "eq" and column in self.indexes:
+                candidates = self.indexes[column].get(value, [])
+                break
+        if candidates is None:
+            candidates = self.rows
+        return [row for row in candidates if all(_matches(row, f) for f in filters)]
+
+def _matches(row: Dict, condition: tuple) -> bool:
+    op, column, value = condition
+    if op == "eq":
+        return row.get(column) == value
+    if op == "neq":
+        return row.get(column) != value
+    if op == "in":
+        return row.get(column) in value
+    raise ValueError(f"Unsupported filter: {op}")
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for the routers"""
+
+    def __init__(self, db: "FakeSupabase", table: FakeTable):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload = None
+        self._filters: List[tuple] = []
+        self._limit: Optional[int] = None
+
+    # ---- operations ----
+    def select(self, columns: str = "*", **kwargs):
+        self._op = "select"
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, payload, **kwargs):
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def update(self, payload, **kwargs):
+        self._op = "update"
+        self._payload = payload
+        return self
+
+    def delete(self, **kwargs):
+        self._op = "delete"
+        return self
+
+    # ---- filters ----
+    def eq(self, column: str, value):
+        self._filters.append(("eq", column, value))
+        return self
+
+    def neq(self, column: str, value):
+        self._filters.append(("neq", column, value))
+        return self
+
+    def in_(self, column: str, values):
+        self._filters.append(("in", column, set(values)))
+        return self
+
+    def match(self, query: Dict):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._db.simulate_latency()
+        table = self._table
+
+        if self._op == "insert":
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            return FakeResponse([dict(table.insert(row)) for row in payload])
+
+        rows = table.find(self._filters)
+
+        if self._op == "update":
+            for row in rows:
+                row.update(self._payload)
+            return FakeResponse([dict(row) for row in rows])
+
+        if self._op == "delete":
+            doomed = {id(row) for row in rows}
+            table.rows = [row for row in table.rows if id(row) not in doomed]
+            for index in table.indexes.values():
+                for key in list(index):
+                    index[key] = [row for row in index[key] if id(row) not in doomed]
+            return FakeResponse([dict(row) for row in rows])
+
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns is None:
+            return FakeResponse([dict(row) for row in rows])
+        return FakeResponse([{c: row.get(c) for c in self._columns} for row in rows])
+
+class FakeSupabase:
+    """
+    In-process stand-in for the Supabase client used by the routers.
+    execute() blocks for latency_ms (+ up to jitter_ms), like the real
+    sync client waiting on the network.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.tables: Dict[str, FakeTable] = {}
+        self.queries = 0
+        self._random = random.Random(seed)
+
+    def table(self, table_name: str) -> FakeQuery:
+        table = self.tables.get(table_name)
+        if table is None:
+            table = self.tables[table_name] = FakeTable(table_name)
+        return FakeQuery(self, table)
+
+    from_ = table
+
+    def simulate_latency(self):
+        self.queries += 1
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.random() * self.jitter
+        if delay > 0:
+            time.sleep(delay)
+
+    def seed_rows(self, table_name: str, rows: List[Dict]):
+        """Load rows without paying simulated latency"""
+        table = self.table(table_name)._table
+        for row in rows:
+            table.insert(row)
@@ -0,0 +1,318 @@
+# backend/bench/run.py
+"""
+Benchmark main.app in-process against a fake Supabase
+
+Run from backend/:
+    python -m bench.run                                  # all scenarios
+    python -m bench.run --scenario friends --friends 1,100,1000 --latency-ms 5
+    python -m bench.run --scenario mixed --requests 5000 --concurrency 64 --json
+
+Scenarios:
+    auth     signup storm, then login storm for the same accounts
+    rooms    create-room burst, then join-room burst into those rooms
+    matchmake  quick-play burst through POST /game/matchmake
+    friends  GET /friends/list for users with N friends (per --friends)
+    mixed    weighted mix of the above against a pre-seeded world
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+# Must be set before main/db.client are imported
+os.environ.setdefault("SUPABASE_URL", "http://bench.invalid")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench.bench.bench")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Storms come from one client; lift the per-client limits unless asked not to
+os.environ.setdefault("RATE_LIMITS", ",".join(
+    f"{name}=1000000:1000000" for name in ("signup", "login", "friends_list", "friends_send_request")
+))
+# ...and don't shed load: the storms are meant to measure it (0 disables a signal)
+os.environ.setdefault("SHED_LOOP_LAG_MS", "0")
+os.environ.setdefault("SHED_DB_IN_FLIGHT", "0")
+
+import httpx
+
+from .fake_supabase import FakeSupabase
+
+# (method, path, json body, headers)
+Call = Tuple[str, str, Dict, Dict]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class Recorder:
+    """Latencies per label plus error counts"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, label: str, seconds: float, ok: bool):
+        self.latencies.setdefault(label, []).append(seconds)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def report(self, elapsed: float) -> Dict:
+        result = {}
+        for label, values in self.latencies.items():
+            values.sort()
+            result[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2)
+            }
+        return result
+
+async def drive(client: httpx.AsyncClient, calls: List[Tuple[str, Call]],
+                concurrency: int, check: Callable = None) -> Dict:
+    """Fire calls with at most `concurrency` in flight; returns the report"""
+    recorder = Recorder()
+    pending = iter(calls)
+
+    async def worker():
+        for label, (method, path, body, headers) in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body or None, headers=headers)
+                ok = response.status_code < 400 and (check is None or check(response))
+            except Exception:
+                ok = False
+            recorder.add(label, time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    report = recorder.report(elapsed)
+    total = sum(len(v) for v in recorder.latencies.values())
+    report["_total"] = {"requests": total, "seconds": round(elapsed, 3),
+                        "rps": round(total / elapsed, 1) if elapsed else 0.0}
+    return report
+
+def success_flag(response: httpx.Response) -> bool:
+    """Most endpoints return 200 with success=false on failure"""
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return not isinstance(body, dict) or body.get("success", True) is not False
+
+# ============ WORLD SEEDING ============
+
+def make_player(username: str, password: str = "benchpass") -> Dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "username": username,
+        "password_hash": hashlib.sha256(password.encode()).hexdigest(),
+        "coins": 100,
+        "level": 1,
+        "created_at": time.time()
+    }
+
+def seed_players(fake: FakeSupabase, count: int, prefix: str) -> List[Dict]:
+    players = [make_player(f"{prefix}{i}") for i in range(count)]
+    fake.seed_rows("players", players)
+    return players
+
+def seed_friends(fake: FakeSupabase, user: Dict, friends: List[Dict]):
+    now = time.time()
+    rows = []
+    for friend in friends:
+        rows.append({"id": str(uuid.uuid4()), "user_id": user["id"], "friend_id": friend["id"],
+                     "status": "accepted", "accepted_at": now})
+        rows.append({"id": str(uuid.uuid4()), "user_id": friend["id"], "friend_id": user["id"],
+                     "status": "accepted", "accepted_at": now})
+    fake.seed_rows("friends", rows)
+
+def auth_header(player: Dict) -> Dict:
+    from auth.utils import create_access_token
+    return {"Authorization": f"Bearer {create_access_token(player['id'], player['username'])}"}
+
+# ============ SCENARIOS ============
+
+async def scenario_auth(client, fake, args) -> Dict:
+    names = [f"storm{uuid.uuid4().hex[:10]}" for _ in range(args.requests)]
+    signups = [("POST /auth/signup", ("POST", "/auth/signup",
+                {"username": n, "password": "benchpass"}, {})) for n in names]
+    logins = [("POST /auth/login", ("POST", "/auth/login",
+               {"username": n, "password": "benchpass"}, {})) for n in names]
+    report = {"signup": await drive(client, signups, args.concurrency, success_flag)}
+    report["login"] = await drive(client, logins, args.concurrency, success_flag)
+    return report
+
+async def scenario_rooms(client, fake, args) -> Dict:
+    from game import routes as game_routes
+    hosts = seed_players(fake, max(1, args.requests // 8), "host")
+    joiners = seed_players(fake, args.requests, "joiner")
+
+    creates = [("POST /game/create-room", ("POST", "/game/create-room",
+                {"player_id": p["id"]}, {})) for p in hosts]
+    report = {"create": await drive(client, creates, args.concurrency, success_flag)}
+
+    room_ids = [game_routes.player_sessions[p["id"]] for p in hosts
+                if p["id"] in game_routes.player_sessions]
+    if not room_ids:
+        return report
+    rng = random.Random(args.seed)
+    joins = [("POST /game/join-room", ("POST", "/game/join-room",
+              {"room_id": rng.choice(room_ids), "player_id": p["id"]}, {})) for p in joiners]
+    # Full rooms answer success=false, which is expected under a burst
+    report["join"] = await drive(client, joins, args.concurrency)
+    return report
+
+async def scenario_matchmake(client, fake, args) -> Dict:
+    players = seed_players(fake, args.requests, "quick")
+    calls = [("POST /game/matchmake", ("POST", "/game/matchmake",
+              {"player_id": p["id"]}, {})) for p in players]
+    return {"matchmake": await drive(client, calls, args.concurrency, success_flag)}
+
+async def scenario_friends(client, fake, args) -> Dict:
+    report = {}
+    for friend_count in args.friends:
+        user = seed_players(fake, 1, f"popular{friend_count}_")[0]
+        friends = seed_players(fake, friend_count, f"friend{friend_count}_")
+        seed_friends(fake, user, friends)
+        headers = auth_header(user)
+        repeats = max(1, min(args.requests, args.requests * 10 // max(friend_count, 1)))
+        calls = [("GET /friends/list", ("GET", "/friends/list", {}, headers))] * repeats
+        report[f"{friend_count}_friends"] = await drive(client, calls, args.concurrency, success_flag)
+    return report
+
+async def scenario_mixed(client, fake, args) -> Dict:
+    rng = random.Random(args.seed)
+    players = seed_players(fake, 500, "mixed")
+    for player in players[:50]:
+        seed_friends(fake, player, rng.sample(players, 20))
+    headers = [auth_header(p) for p in players[:50]]
+
+    calls: List[Tuple[str, Call]] = []
+    mix = [("login", 30), ("signup", 5), ("create", 10), ("join", 30), ("friends", 20), ("requests", 5)]
+    labels = [name for name, weight in mix for _ in range(weight)]
+    for _ in range(args.requests):
+        kind = rng.choice(labels)
+        player = rng.choice(players)
+        if kind == "login":
+            calls.append(("POST /auth/login", ("POST", "/auth/login",
+                          {"username": player["username"], "password": "benchpass"}, {})))
+        elif kind == "signup":
+            calls.append(("POST /auth/signup", ("POST", "/auth/signup",
+                          {"username": f"new{uuid.uuid4().hex[:10]}", "password": "benchpass"}, {})))
+        elif kind == "create":
+            calls.append(("POST /game/create-room", ("POST", "/game/create-room",
+                          {"player_id": player["id"]}, {})))
+        elif kind == "join":
+            # Room ids are only known at run time; join whatever the player last created
+            calls.append(("POST /game/join-room", ("POST", "/game/join-room",
+                          {"room_id": "", "player_id": player["id"]}, {})))
+        elif kind == "friends":
+            calls.append(("GET /friends/list", ("GET", "/friends/list", {}, rng.choice(headers))))
+        else:
+            calls.append(("GET /friends/requests", ("GET", "/friends/requests", {}, rng.choice(headers))))
+
+    from game import routes as game_routes
+
+    def fill_room_ids():
+        open_rooms = list(game_routes.rooms)
+        for _, (method, path, body, _) in calls:
+            if path == "/game/join-room" and not body["room_id"] and open_rooms:
+                body["room_id"] = rng.choice(open_rooms)
+
+    # Pre-create some rooms so joins have somewhere to go
+    warmup = [("POST /game/create-room", ("POST", "/game/create-room",
+               {"player_id": p["id"]}, {})) for p in players[:max(1, args.requests // 50)]]
+    await drive(client, warmup, args.concurrency)
+    fill_room_ids()
+    return {"mixed": await drive(client, calls, args.concurrency)}
+
+SCENARIOS = {
+    "auth": scenario_auth,
+    "rooms": scenario_rooms,
+    "matchmake": scenario_matchmake,
+    "friends": scenario_friends,
+    "mixed": scenario_mixed
+}
+
+# ============ ENTRY POINT ============
+
+def print_report(name: str, report: Dict):
+    print(f"\n== {name} ==")
+    for phase, results in report.items():
+        total = results.get("_total", {})
+        print(f"  {phase}: {total.get('requests', 0)} requests in {total.get('seconds', 0)}s "
+              f"({total.get('rps', 0)} req/s)")
+        for label, stats in results.items():
+            if label == "_total":
+                continue
+            print(f"    {label:<24} n={stats['requests']:<6} err={stats['errors']:<5} "
+                  f"p50={stats['p50_ms']:>8}ms p95={stats['p95_ms']:>8}ms p99={stats['p99_ms']:>8}ms")
+
+def reset_world():
+    """Drop the in-process state earlier scenarios left behind"""
+    from db import accounting
+    from game import routes as game_routes
+    from metrics import registry
+    from ratelimit import limiter
+
+    game_routes.rooms.clear()
+    game_routes.player_sessions.clear()
+    game_routes.open_rooms.rebuild(game_routes.rooms)
+    game_routes.room_store.dirty.clear()
+    game_routes.matchmaker.waiting.clear()
+    limiter.reset()
+    accounting.route_totals.clear()
+    registry.reset()
+
+async def main(args) -> Dict:
+    from db.client import supabase
+    from main import app
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {"config": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                          "requests": args.requests, "concurrency": args.concurrency}}
+
+    for name in names:
+        # Fresh world per scenario so results don't depend on order
+        reset_world()
+        fake = FakeSupabase(args.latency_ms, args.jitter_ms, args.seed)
+        supabase.use(fake)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            report = await SCENARIOS[name](client, fake, args)
+        results[name] = report
+        results[name]["_db_queries"] = fake.queries
+        if not args.json:
+            print_report(name, {k: v for k, v in report.items() if not k.startswith("_")})
+            print(f"  supabase queries: {fake.queries}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bricktopia API benchmarks")
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--requests", type=int, default=500, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="injected latency per query")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random latency per query")
+    parser.add_argument("--friends", default="1,10,100,1000",
+                        type=lambda s: [int(n) for n in s.split(",")],
+                        help="friend counts for the friends scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,114 @@
+# backend/db/accounting.py
+import contextvars
+import os
+import threading
+from typing import Dict, Optional
+
+# Warn when one request issues more Supabase queries than this
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "10"))
+
+class QueryStats:
+    """Supabase queries issued while handling a single request"""
+    __slots__ = ("count", "seconds", "tables")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.tables: Dict[str, list] = {}  # table → [queries, seconds]
+
+    def record(self, table: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.tables.get(table)
+        if entry is None:
+            self.tables[table] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def server_timing(self) -> str:
+        """Format as a Server-Timing header value (durations in ms)"""
+        parts = [f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"']
+        for table, (count, seconds) in self.tables.items():
+            parts.append(f'db-{table};dur={seconds * 1000:.1f};desc="{count} queries"')
+        return ", ".join(parts)
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+# Aggregated per route: route → totals since startup
+route_totals: Dict[str, Dict] = {}
+
+# Supabase calls issued and not yet answered, including execute_async() calls
+# still queued for a worker thread
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+def query_started():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+
+def query_finished():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+def in_flight() -> int:
+    """Supabase calls in progress right now"""
+    return _in_flight
+
+def begin_request() -> QueryStats:
+    """Start counting queries for the current request"""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+def record_query(table: str, seconds: float):
+    """Called by the traced client after every execute()"""
+    stats = _current.get()
+    if stats is not None:
+        stats.record(table, seconds)
+
+def finish_request(route: str, stats: QueryStats) -> bool:
+    """Fold a finished request into the per-route totals. Returns True if over budget."""
+    totals = route_totals.get(route)
+    if totals is None:
+        totals = route_totals[route] = {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "over_budget": 0,
+            "db_seconds": 0.0,
+            "tables": {}
+        }
+
+    over_budget = stats.count > QUERY_BUDGET
+
+    totals["requests"] += 1
+    totals["queries"] += stats.count
+    totals["db_seconds"] += stats.seconds
+    if stats.count > totals["max_queries"]:
+        totals["max_queries"] = stats.count
+    if over_budget:
+        totals["over_budget"] += 1
+
+    for table, (count, seconds) in stats.tables.items():
+        table_totals = totals["tables"].setdefault(table, {"queries": 0, "seconds": 0.0})
+        table_totals["queries"] += count
+        table_totals["seconds"] += seconds
+
+    return over_budget
+
+def snapshot() -> Dict:
+    """Per-route query totals with averages, for the metrics endpoint"""
+    result = {}
+    for route, totals in route_totals.items():
+        requests = totals["requests"] or 1
+        result[route] = {
+            **totals,
+            "avg_queries": round(totals["queries"] / requests, 2),
+            "avg_db_ms": round(totals["db_seconds"] * 1000 / requests, 2)
+        }
+    return {"budget": QUERY_BUDGET, "routes": result}
@@ -0,0 +1,86 @@
+# backend/db/client.py
+from supabase import create_client
+import asyncio
+import os
+import time
+from .accounting import record_query, query_started, query_finished
+
+class TracedQuery:
+    """
+    Wraps a postgrest query builder so execute() is timed and counted
+    against the current request. Chained calls (.select(), .eq(), ...)
+    keep returning traced builders.
+    """
+    __slots__ = ("_builder", "_table")
+
+    def __init__(self, builder, table: str):
+        self._builder = builder
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if hasattr(attr, "execute"):
+            return TracedQuery(attr, self._table)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return TracedQuery(result, self._table)
+            return result
+
+        return call
+
+    def execute(self):
+        query_started()
+        try:
+            return self._timed_execute()
+        finally:
+            query_finished()
+
+    def _timed_execute(self):
+        start = time.perf_counter()
+        try:
+            return self._builder.execute()
+        finally:
+            record_query(self._table, time.perf_counter() - start)
+
+class TracedClient:
+    """Supabase client whose table queries are accounted per request"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, table_name: str) -> TracedQuery:
+        return TracedQuery(self._client.table(table_name), table_name)
+
+    from_ = table
+
+    def use(self, client):
+        """Swap the underlying client (the benchmarks plug in bench.fake_supabase)"""
+        self._client = client
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+async def execute_async(query):
+    """
+    Run a query's blocking execute() on a worker thread so the event loop
+    keeps serving other requests while Supabase answers
+
+    Usage:
+        result = await execute_async(supabase.table("players").select("id").eq("id", player_id))
+    """
+    # Counted on the loop, so calls still waiting for a worker thread show up in in_flight()
+    query_started()
+    try:
+        return await asyncio.to_thread(query._timed_execute)
+    finally:
+        query_finished()
+
+# Shared Supabase client for all routers
+supabase = TracedClient(create_client(
+    os.getenv("SUPABASE_URL"),
+    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+))
@@ -0,0 +1,39 @@
+# backend/db/middleware.py
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from metrics.utils import route_label
+from logger.structured import get_logger
+from .accounting import begin_request, finish_request, QUERY_BUDGET
+
+logger = get_logger("db")
+
+class QueryAccountingMiddleware:
+    """
+    Count Supabase queries per request, report them in Server-Timing
+    and warn when a request goes over DB_QUERY_BUDGET
+
+    Usage in main.py:
+        app.add_middleware(QueryAccountingMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = begin_request()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                route = route_label(scope)
+                if finish_request(route, stats):
+                    per_table = {table: count for table, (count, _) in stats.tables.items()}
+                    logger.warning("query_budget_exceeded", method=scope["method"], route=route,
+                                   queries=stats.count, budget=QUERY_BUDGET, tables=per_table)
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -4,16 +4,13 @@ from typing import List, Dict, Optional
 import uuid
 from datetime import datetime
 from auth.middleware import get_current_user
-from supabase import create_client
+from db.client import supabase, execute_async
+from logger.structured import get_logger
+from ratelimit.limiter import limit_by_user
 import os
 
 router = APIRouter()
-
-# Initialize Supabase
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+logger = get_logger("friends")
 
 # ============ MODELS ============
 
@@ -33,7 +30,7 @@ class FriendResponse(BaseModel):
 
 # ============ ENDPOINTS ============
 
-@router.post("/send-request", response_model=FriendResponse)
+@router.post("/send-request", response_model=FriendResponse, dependencies=[Depends(limit_by_user("friends_send_request"))])
 async def send_friend_request(
     request: FriendRequest,
     current_user: dict = Depends(get_current_user)
@@ -44,7 +41,7 @@ async def send_friend_request(
         from_username = current_user["username"]
         to_username = request.to_username.strip().lower()
         
-        print(f"[Friends] {from_username} -> {to_username}")
+        logger.info("send_request", from_username=from_username, to_username=to_username)
         
         # Can't send request to yourself
         if from_username.lower() == to_username:
@@ -54,7 +51,7 @@ async def send_friend_request(
             )
         
         # Find target user
-        target_result = supabase.table("players").select("id, username").eq("username", to_username).execute()
+        target_result = await execute_async(supabase.table("players").select("id, username").eq("username", to_username))
         if not target_result.data:
             return FriendResponse(
                 success=False, 
@@ -64,13 +61,13 @@ async def send_friend_request(
         to_user_id = target_result.data[0]["id"]
         to_username = target_result.data[0]["username"]
         
-        print(f"[Friends] Target found: {to_user_id} ({to_username})")
+        logger.debug("send_request_target_found", to_user_id=to_user_id, to_username=to_username)
         
         # Check if already friends
-        existing_friend = supabase.table("friends").select("*").match({
+        existing_friend = await execute_async(supabase.table("friends").select("*").match({
             "user_id": from_user_id,
             "friend_id": to_user_id
-        }).execute()
+        }))
         
         if existing_friend.data:
             return FriendResponse(
@@ -79,11 +76,11 @@ async def send_friend_request(
             )
         
         # Check if request already exists (pending)
-        existing_request = supabase.table("friend_requests").select("*").match({
+        existing_request = await execute_async(supabase.table("friend_requests").select("*").match({
             "from_user": from_user_id,
             "to_user": to_user_id,
             "status": "pending"
-        }).execute()
+        }))
         
         if existing_request.data:
             return FriendResponse(
@@ -92,11 +89,11 @@ async def send_friend_request(
             )
         
         # Check if THEY sent YOU a request (reverse check)
-        reverse_request = supabase.table("friend_requests").select("*").match({
+        reverse_request = await execute_async(supabase.table("friend_requests").select("*").match({
             "from_user": to_user_id,
             "to_user": from_user_id,
             "status": "pending"
-        }).execute()
+        }))
         
         if reverse_request.data:
             return FriendResponse(
@@ -115,9 +112,9 @@ async def send_friend_request(
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table("friend_requests").insert(friend_request).execute()
+        result = await execute_async(supabase.table("friend_requests").insert(friend_request))
         
-        print(f"[Friends] Request created: {request_id}")
+        logger.info("send_request_created", request_id=request_id)
         
         return FriendResponse(
             success=True,
@@ -126,9 +123,7 @@ async def send_friend_request(
         )
         
     except Exception as e:
-        print(f"[Friends] Send request error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("send_request_failed")
         return FriendResponse(success=False, error="Server error: " + str(e))
 
 @router.post("/accept-request", response_model=FriendResponse)
@@ -142,14 +137,14 @@ async def accept_friend_request(
         username = current_user["username"]
         request_id = request.request_id
         
-        print(f"[Friends] {username} accepting request {request_id}")
+        logger.info("accept_request", username=username, request_id=request_id)
         
         # Get the request
-        request_result = supabase.table("friend_requests").select("*").match({
+        request_result = await execute_async(supabase.table("friend_requests").select("*").match({
             "id": request_id,
             "to_user": user_id,
             "status": "pending"
-        }).execute()
+        }))
         
         if not request_result.data:
             return FriendResponse(
@@ -161,44 +156,42 @@ async def accept_friend_request(
         from_user_id = friend_request["from_user"]
         
         # Get sender's username for logging
-        sender_result = supabase.table("players").select("username").eq("id", from_user_id).execute()
+        sender_result = await execute_async(supabase.table("players").select("username").eq("id", from_user_id))
         sender_username = sender_result.data[0]["username"] if sender_result.data else "Unknown"
         
         # Create friendship (both directions)
         now = datetime.utcnow().isoformat()
         
         # Add user A → user B (you → them)
-        supabase.table("friends").insert({
+        await execute_async(supabase.table("friends").insert({
             "id": str(uuid.uuid4()),
             "user_id": user_id,
             "friend_id": from_user_id,
             "status": "accepted",
             "accepted_at": now
-        }).execute()
+        }))
         
         # Add user B → user A (them → you) - reciprocal
-        supabase.table("friends").insert({
+        await execute_async(supabase.table("friends").insert({
             "id": str(uuid.uuid4()),
             "user_id": from_user_id,
             "friend_id": user_id,
             "status": "accepted",
             "accepted_at": now
-        }).execute()
+        }))
         
         # Update request status
-        supabase.table("friend_requests").update({
+        await execute_async(supabase.table("friend_requests").update({
             "status": "accepted",
             "processed_at": now
-        }).eq("id", request_id).execute()
+        }).eq("id", request_id))
         
-        print(f"[Friends] {username} and {sender_username} are now friends!")
+        logger.info("accept_request_done", username=username, friend_username=sender_username)
         
         return FriendResponse(success=True)
         
     except Exception as e:
-        print(f"[Friends] Accept request error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("accept_request_failed")
         return FriendResponse(success=False, error="Server error: " + str(e))
 
 @router.post("/decline-request", response_model=FriendResponse)
@@ -212,40 +205,40 @@ async def decline_friend_request(
         request_id = request.request_id
         
         # Update request status
-        supabase.table("friend_requests").update({
+        await execute_async(supabase.table("friend_requests").update({
             "status": "declined",
             "processed_at": datetime.utcnow().isoformat()
         }).match({
             "id": request_id,
             "to_user": user_id,
             "status": "pending"
-        }).execute()
+        }))
         
-        print(f"[Friends] Request {request_id} declined by user {user_id}")
+        logger.info("decline_request", request_id=request_id, user_id=user_id)
         
         return FriendResponse(success=True)
         
     except Exception as e:
-        print(f"[Friends] Decline request error: {e}")
+        logger.exception("decline_request_failed")
         return FriendResponse(success=False, error="Server error: " + str(e))
 
-@router.get("/list", response_model=FriendResponse)
+@router.get("/list", response_model=FriendResponse, dependencies=[Depends(limit_by_user("friends_list"))])
 async def get_friends(current_user: dict = Depends(get_current_user)):
     """Get user's friends list"""
     try:
         user_id = current_user["user_id"]
         username = current_user["username"]
         
-        print(f"[Friends] Getting friends for {username} ({user_id})")
+        logger.debug("list_friends", username=username, user_id=user_id)
         
         # Get friends with usernames and basic info
         # Note: Supabase foreign key syntax can be tricky. Let's do it in two queries if needed.
         
         # First get friend IDs
-        friends_result = supabase.table("friends").select("friend_id").eq("user_id", user_id).eq("status", "accepted").execute()
+        friends_result = await execute_async(supabase.table("friends").select("friend_id").eq("user_id", user_id).eq("status", "accepted"))
         
         if not friends_result.data:
-            print(f"[Friends] No friends found for {username}")
+            logger.debug("list_friends_empty", username=username)
             return FriendResponse(
                 success=True,
                 friends=[]
@@ -256,14 +249,14 @@ async def get_friends(current_user: dict = Depends(get_current_user)):
         # Get friend details
         friends_details = []
         for friend_id in friend_ids:
-            player_result = supabase.table("players").select("id, username, coins, level, created_at").eq("id", friend_id).execute()
+            player_result = await execute_async(supabase.table("players").select("id, username, coins, level, created_at").eq("id", friend_id))
             if player_result.data:
                 friend_info = player_result.data[0]
                 # Add friendship metadata
-                friendship = supabase.table("friends").select("accepted_at").match({
+                friendship = await execute_async(supabase.table("friends").select("accepted_at").match({
                     "user_id": user_id,
                     "friend_id": friend_id
-                }).execute()
+                }))
                 
                 friends_details.append({
                     "friend": friend_info,
@@ -271,7 +264,7 @@ async def get_friends(current_user: dict = Depends(get_current_user)):
                     "accepted_at": friendship.data[0]["accepted_at"] if friendship.data else None
                 })
         
-        print(f"[Friends] Found {len(friends_details)} friends for {username}")
+        logger.info("list_friends_done", username=username, count=len(friends_details))
         
         return FriendResponse(
             success=True,
@@ -279,9 +272,7 @@ async def get_friends(current_user: dict = Depends(get_current_user)):
         )
         
     except Exception as e:
-        print(f"[Friends] Get friends error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("list_friends_failed")
         return FriendResponse(success=False, error="Server error: " + str(e), friends=[])
 
 @router.get("/requests", response_model=FriendResponse)
@@ -291,14 +282,14 @@ async def get_friend_requests(current_user: dict = Depends(get_current_user)):
         user_id = current_user["user_id"]
         username = current_user["username"]
         
-        print(f"[Friends] Getting requests for {username}")
+        logger.debug("list_requests", username=username)
         
         # Get incoming requests
         # We'll do a simpler approach: get requests and then fetch sender info
-        requests_result = supabase.table("friend_requests").select("*").eq("to_user", user_id).eq("status", "pending").execute()
+        requests_result = await execute_async(supabase.table("friend_requests").select("*").eq("to_user", user_id).eq("status", "pending"))
         
         if not requests_result.data:
-            print(f"[Friends] No pending requests for {username}")
+            logger.debug("list_requests_empty", username=username)
             return FriendResponse(
                 success=True,
                 requests=[]
@@ -307,7 +298,7 @@ async def get_friend_requests(current_user: dict = Depends(get_current_user)):
         requests_with_senders = []
         for req in requests_result.data:
             # Get sender info
-            sender_result = supabase.table("players").select("id, username, created_at").eq("id", req["from_user"]).execute()
+            sender_result = await execute_async(supabase.table("players").select("id, username, created_at").eq("id", req["from_user"]))
             sender_info = sender_result.data[0] if sender_result.data else {"username": "Unknown"}
             
             requests_with_senders.append({
@@ -317,7 +308,7 @@ async def get_friend_requests(current_user: dict = Depends(get_current_user)):
                 "created_at": req["created_at"]
             })
         
-        print(f"[Friends] Found {len(requests_with_senders)} pending requests for {username}")
+        logger.info("list_requests_done", username=username, count=len(requests_with_senders))
         
         return FriendResponse(
             success=True,
@@ -325,9 +316,7 @@ async def get_friend_requests(current_user: dict = Depends(get_current_user)):
         )
         
     except Exception as e:
-        print(f"[Friends] Get requests error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("list_requests_failed")
         return FriendResponse(success=False, error="Server error: " + str(e), requests=[])
 
 @router.get("/test")
@@ -1,31 +1,53 @@
 # game/cleanup.py
 import asyncio
+import contextvars
+import os
 import time
-from typing import Dict
+from typing import Optional
+from logger.structured import get_logger
+from .routes import rooms, player_sessions, open_rooms, room_locks, room_store
 
-rooms: Dict[str, Dict] = {}
-player_sessions: Dict[str, str] = {}
+logger = get_logger("game.cleanup")
+
+# Settings
+ROOM_MAX_AGE = float(os.getenv("ROOM_MAX_AGE", "3600"))  # delete rooms older than 1 hour
+CLEANUP_INTERVAL = float(os.getenv("ROOM_CLEANUP_INTERVAL", "300"))  # check every 5 minutes
+
+_task: Optional[asyncio.Task] = None
+
+async def remove_old_rooms() -> int:
+    """Delete rooms older than ROOM_MAX_AGE from the live game state"""
+    cutoff = time.time() - ROOM_MAX_AGE
+    expired = [room_id for room_id, room in rooms.items() if room["created_at"] < cutoff]
+
+    for room_id in expired:
+        async with room_locks.lock(room_id):
+            room = rooms.pop(room_id, None)
+            if room is None:
+                continue
+            for player in room["players"]:
+                # The player may have moved to another room since
+                if player_sessions.get(player["id"]) == room_id:
+                    del player_sessions[player["id"]]
+            open_rooms.discard(room_id)
+            room_store.mark(room_id)
+        logger.info("cleanup_room", room_id=room_id)
+
+    return len(expired)
 
 async def cleanup_old_rooms():
     """Background task to clean up inactive rooms"""
     while True:
-        await asyncio.sleep(300)  # Check every 5 minutes
-        
-        current_time = time.time()
-        rooms_to_delete = []
-        
-        for room_id, room in list(rooms.items()):
-            # Delete rooms older than 1 hour
-            if current_time - room["created_at"] > 3600:
-                rooms_to_delete.append(room_id)
-                # Remove player sessions
-                for player_id in room["players"]:
-                    player_sessions.pop(player_id, None)
-                print(f"Cleaned up old room: {room_id}")
-        
-        for room_id in rooms_to_delete:
-            del rooms[room_id]
+        try:
+            # Runs right away too, so rooms restored from a snapshot expire
+            await remove_old_rooms()
+        except Exception:
+            logger.exception("cleanup_failed")
+        await asyncio.sleep(CLEANUP_INTERVAL)
 
 async def start_cleanup_task():
     """Start the cleanup task"""
-    asyncio.create_task(cleanup_old_rooms())
\ No newline at end of file
+    global _task
+    if _task is None or _task.done():
+        # Empty context: the task must not inherit the caller's request state
+        _task = contextvars.Context().run(asyncio.create_task, cleanup_old_rooms())
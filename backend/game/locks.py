@@ -0,0 +1,21 @@
+# game/locks.py
+import asyncio
+import zlib
+from typing import List
+
+class ShardedLocks:
+    """
+    Fixed pool of asyncio locks; a key always maps to the same lock.
+    Rooms in different shards never contend, and memory stays bounded
+    no matter how many rooms exist.
+
+    Usage:
+        async with room_locks.lock(room_id):
+            ...  # read and change room membership
+    """
+
+    def __init__(self, shards: int = 64):
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(shards)]
+
+    def lock(self, key: str) -> asyncio.Lock:
+        return self._locks[zlib.crc32(key.encode()) % len(self._locks)]
@@ -0,0 +1,117 @@
+# game/matchmaking.py
+import asyncio
+import contextvars
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from logger.structured import get_logger
+
+logger = get_logger("game.matchmaking")
+
+MAX_ROOM_PLAYERS = 8
+
+# Settings
+MATCHMAKE_TICK = float(os.getenv("MATCHMAKE_TICK_MS", "50")) / 1000
+MATCHMAKE_TIMEOUT = float(os.getenv("MATCHMAKE_TIMEOUT", "10"))
+
+class OpenRoomIndex:
+    """
+    Rooms with free slots, bucketed by how many slots are free, so
+    quick-play picks a room in O(capacity) without scanning `rooms`.
+    Buckets are insertion-ordered dicts used as ordered sets.
+    """
+
+    def __init__(self, capacity: int = MAX_ROOM_PLAYERS):
+        self.capacity = capacity
+        self.buckets: List[Dict[str, None]] = [{} for _ in range(capacity + 1)]
+        self.free: Dict[str, int] = {}  # room_id → free slots
+
+    def update(self, room_id: str, player_count: int):
+        """Re-bucket a room after its player count changed"""
+        free = self.capacity - player_count
+        old = self.free.get(room_id)
+        if old == free:
+            return
+        if old is not None:
+            del self.buckets[old][room_id]
+        if free > 0:
+            self.buckets[free][room_id] = None
+            self.free[room_id] = free
+        else:
+            self.free.pop(room_id, None)
+
+    def discard(self, room_id: str):
+        """Forget a room (deleted, started, ...)"""
+        old = self.free.pop(room_id, None)
+        if old is not None:
+            del self.buckets[old][room_id]
+
+    def pick(self) -> Optional[str]:
+        """Fullest room that still has a slot, so rooms fill up fast"""
+        for free in range(1, self.capacity + 1):
+            bucket = self.buckets[free]
+            if bucket:
+                return next(iter(bucket))
+        return None
+
+    def rebuild(self, rooms: Dict[str, Dict]):
+        """Re-index from scratch (e.g. after restoring rooms)"""
+        self.buckets = [{} for _ in range(self.capacity + 1)]
+        self.free = {}
+        for room_id, room in rooms.items():
+            self.update(room_id, len(room["players"]))
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+# Places a batch of player ids into rooms, returns player_id → room_id
+PlaceBatch = Callable[[List[str]], Awaitable[Dict[str, str]]]
+
+class Matchmaker:
+    """
+    Quick-play waiting queue. Requests park on a future; every tick the
+    whole queue is handed to `place_batch` in one go, so a burst of
+    joins costs one placement pass (and one username lookup) per tick.
+    """
+
+    def __init__(self, place_batch: PlaceBatch, tick: float = MATCHMAKE_TICK):
+        self.place_batch = place_batch
+        self.tick = tick
+        self.waiting: List[Tuple[str, asyncio.Future]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, player_id: str, timeout: float = MATCHMAKE_TIMEOUT) -> str:
+        """Wait for the next tick to place this player; returns the room id"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append((player_id, future))
+        if self._task is None or self._task.done():
+            # Start from an empty context: the task outlives this request and
+            # must not inherit its request id or query stats
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        return await asyncio.wait_for(future, timeout)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            if not self.waiting:
+                continue
+
+            batch, self.waiting = self.waiting, []
+            try:
+                placed = await self.place_batch([player_id for player_id, _ in batch])
+            except Exception as e:
+                logger.exception("matchmake_batch_failed", batch=len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for player_id, future in batch:
+                if future.done():
+                    continue  # caller timed out
+                room_id = placed.get(player_id)
+                if room_id is None:
+                    future.set_exception(RuntimeError("Player was not placed"))
+                else:
+                    future.set_result(room_id)
+
+            logger.debug("matchmake_batch", batch=len(batch), queued=len(self.waiting))
@@ -4,11 +4,15 @@ from typing import List, Dict, Optional
 
 class CreateRoomRequest(BaseModel):
     player_id: str
+    public: bool = False  # let quick-play fill it; otherwise joinable by code only
 
 class JoinRoomRequest(BaseModel):
     room_id: str
     player_id: str
 
+class MatchmakeRequest(BaseModel):
+    player_id: str
+
 class GameActionRequest(BaseModel):
     player_id: str
     action: str
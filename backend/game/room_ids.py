@@ -0,0 +1,44 @@
+# game/room_ids.py
+import math
+import secrets
+from typing import Container
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+ROOM_ID_LENGTH = 6
+ID_SPACE = len(ALPHABET) ** ROOM_ID_LENGTH  # ~2.2 billion codes
+
+class RoomIdAllocator:
+    """
+    Short room codes from a counter pushed through an affine permutation
+    of the code space (a*n + b mod 36^6). Successive codes look random but
+    never repeat until the whole space is used; the membership check only
+    matters for rooms that existed before this process started (restored
+    from a snapshot), so allocation stays O(1).
+    """
+
+    def __init__(self):
+        self.multiplier = self._coprime_multiplier()
+        self.offset = secrets.randbelow(ID_SPACE)
+        self.counter = secrets.randbelow(ID_SPACE)
+
+    @staticmethod
+    def _coprime_multiplier() -> int:
+        while True:
+            candidate = secrets.randbelow(ID_SPACE - 2) + 2
+            if math.gcd(candidate, ID_SPACE) == 1:
+                return candidate
+
+    def _encode(self, value: int) -> str:
+        chars = []
+        for _ in range(ROOM_ID_LENGTH):
+            value, digit = divmod(value, len(ALPHABET))
+            chars.append(ALPHABET[digit])
+        return "".join(chars)
+
+    def allocate(self, taken: Container[str]) -> str:
+        """Next unused room id (`taken` is normally the live rooms dict)"""
+        while True:
+            self.counter = (self.counter + 1) % ID_SPACE
+            room_id = self._encode((self.multiplier * self.counter + self.offset) % ID_SPACE)
+            if room_id not in taken:
+                return room_id
@@ -1,72 +1,152 @@
 # game/routes.py - FIXED VERSION
 from fastapi import APIRouter, HTTPException
-from supabase import create_client
+from db.client import supabase, execute_async
 import os
-import uuid
 import time
-from typing import Dict
-from .models import CreateRoomRequest, JoinRoomRequest, GameActionRequest, RoomResponse
+import asyncio
+from typing import Dict, List
+from .models import CreateRoomRequest, JoinRoomRequest, MatchmakeRequest, GameActionRequest, RoomResponse
+from .matchmaking import OpenRoomIndex, Matchmaker, MAX_ROOM_PLAYERS
+from .locks import ShardedLocks
+from .room_ids import RoomIdAllocator
+from .snapshot import RoomStore
+from logger.structured import get_logger
 
 # Define router FIRST
 router = APIRouter()
-
-# Initialize Supabase (shared with auth module)
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+logger = get_logger("game")
 
 # In-memory game state
 rooms: Dict[str, Dict] = {}
 player_sessions: Dict[str, str] = {}  # player_id → room_id
+open_rooms = OpenRoomIndex()  # public rooms with free slots, for quick-play
+room_locks = ShardedLocks()  # hold while changing a room's players
+room_ids = RoomIdAllocator()
+room_store = RoomStore(rooms)  # snapshots + change log for warm restarts
+
+# Player ids per in_() lookup: each UUID adds ~37 URL-encoded bytes to the
+# PostgREST query string, so 50 keeps it near 2 KB, well under 8 KB URI limits
+USERNAME_CHUNK = 50
+
+def restore_rooms() -> int:
+    """Reload rooms saved by the previous process (call before serving)"""
+    count = room_store.restore()
+    player_sessions.clear()
+    for room_id, room in rooms.items():
+        for player in room["players"]:
+            player_sessions[player["id"]] = room_id
+    open_rooms.rebuild({room_id: room for room_id, room in rooms.items() if room.get("public")})
+    return count
+
+async def _fetch_username(player_id: str) -> str:
+    """Username from auth database (off the event loop)"""
+    player_result = await execute_async(supabase.table("players").select("username").eq("id", player_id))
+    return player_result.data[0]["username"] if player_result.data else f"Player_{player_id[:8]}"
+
+def _new_room(host_id: str, username: str, public: bool) -> Dict:
+    """Create and register a room with a single host player (public rooms are open to quick-play)"""
+    room_id = room_ids.allocate(rooms)
+    
+    room = rooms[room_id] = {
+        "id": room_id,
+        "host": host_id,
+        "players": [
+            {
+                "id": host_id,
+                "username": username
+            }
+        ],
+        "created_at": time.time(),
+        "public": public,
+        "state": {
+            "scores": {},
+            "started": False,
+            "turn": 0
+        }
+    }
+    player_sessions[host_id] = room_id
+    if public:
+        open_rooms.update(room_id, 1)
+    room_store.mark(room_id)
+    return room
+
+def _add_player(room: Dict, player_id: str, username: str):
+    """Add a player to a room that has a free slot (hold the room's lock)"""
+    room["players"].append({
+        "id": player_id,
+        "username": username
+    })
+    player_sessions[player_id] = room["id"]
+    if room.get("public"):
+        open_rooms.update(room["id"], len(room["players"]))
+    room_store.mark(room["id"])
+
+def _room_response(room: Dict) -> RoomResponse:
+    return RoomResponse(
+        success=True,
+        room_id=room["id"],
+        photon_room=f"brick_{room['id']}",
+        players=[p["id"] for p in room["players"]],
+        usernames={p["id"]: p["username"] for p in room["players"]}
+    )
+
+async def _place_players(player_ids: List[str]) -> Dict[str, str]:
+    """Matchmaker batch: put every waiting player into the fullest open room"""
+    placed = {}
+    waiting = []
+    for player_id in dict.fromkeys(player_ids):
+        room_id = player_sessions.get(player_id)
+        if room_id in rooms:
+            placed[player_id] = room_id  # already in a room
+        else:
+            waiting.append(player_id)
+    
+    if not waiting:
+        return placed
+    
+    # One username lookup per chunk rather than per player
+    usernames = {}
+    for start in range(0, len(waiting), USERNAME_CHUNK):
+        chunk = waiting[start:start + USERNAME_CHUNK]
+        player_result = await execute_async(supabase.table("players").select("id, username").in_("id", chunk))
+        usernames.update({p["id"]: p["username"] for p in player_result.data or []})
+    
+    for player_id in waiting:
+        username = usernames.get(player_id) or f"Player_{player_id[:8]}"
+        room = None
+        room_id = open_rooms.pick()
+        if room_id is not None:
+            async with room_locks.lock(room_id):
+                # A direct join may have filled it while we waited
+                candidate = rooms.get(room_id)
+                if candidate is not None and len(candidate["players"]) < MAX_ROOM_PLAYERS:
+                    _add_player(candidate, player_id, username)
+                    room = candidate
+        if room is None:
+            room = _new_room(player_id, username, public=True)
+        placed[player_id] = room["id"]
+    
+    logger.info("matchmake_placed", players=len(waiting), open_rooms=len(open_rooms))
+    return placed
+
+matchmaker = Matchmaker(_place_players)
 
 @router.post("/create-room", response_model=RoomResponse)
 async def create_room(request: CreateRoomRequest):
     """Create a new game room"""
     try:
-        print(f"🎮 Creating room for player: {request.player_id}")
-        
-        # Fetch username from auth database
-        player_result = supabase.table("players").select("username").eq("id", request.player_id).execute()
-        username = player_result.data[0]["username"] if player_result.data else f"Player_{request.player_id[:8]}"
-        
-        room_id = str(uuid.uuid4())[:6].lower()
-        
-        rooms[room_id] = {
-            "id": room_id,
-            "host": request.player_id,
-            "players": [
-                {
-                    "id": request.player_id,
-                    "username": username
-                }
-            ],
-            "created_at": time.time(),
-            "state": {
-                "scores": {},
-                "started": False,
-                "turn": 0
-            }
-        }
-        player_sessions[request.player_id] = room_id
+        logger.debug("create_room", player_id=request.player_id)
         
-        print(f"✅ Room created: {room_id}")
+        username = await _fetch_username(request.player_id)
         
-        # Build usernames dictionary
-        usernames = {request.player_id: username}
+        room = _new_room(request.player_id, username, public=request.public)
         
-        return RoomResponse(
-            success=True,
-            room_id=room_id,
-            photon_room=f"brick_{room_id}",
-            players=[request.player_id],
-            usernames=usernames
-        )
+        logger.info("create_room_done", room_id=room["id"], player_id=request.player_id)
+        
+        return _room_response(room)
         
     except Exception as e:
-        print(f"❌ Error creating room: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("create_room_failed", player_id=request.player_id)
         return RoomResponse(
             success=False,
             error=f"Server error: {str(e)}"
@@ -76,7 +156,7 @@ async def create_room(request: CreateRoomRequest):
 async def join_room(request: JoinRoomRequest):
     """Join existing room"""
     try:
-        print(f"🎮 Player {request.player_id} joining room {request.room_id}")
+        logger.debug("join_room", player_id=request.player_id, room_id=request.room_id)
         
         if request.room_id not in rooms:
             return RoomResponse(success=False, error="Room not found")
@@ -86,46 +166,57 @@ async def join_room(request: JoinRoomRequest):
         # Check if player already in room
         for player in room["players"]:
             if player["id"] == request.player_id:
-                # Build usernames mapping for all players
-                usernames = {p["id"]: p["username"] for p in room["players"]}
-                return RoomResponse(
-                    success=True,
-                    room_id=request.room_id,
-                    photon_room=f"brick_{request.room_id}",
-                    players=[p["id"] for p in room["players"]],
-                    usernames=usernames
-                )
+                return _room_response(room)
         
         # Check room capacity
-        if len(room["players"]) >= 8:
-            return RoomResponse(success=False, error="Room full (max 8 players)")
-        
-        # Fetch username from auth database
-        player_result = supabase.table("players").select("username").eq("id", request.player_id).execute()
-        username = player_result.data[0]["username"] if player_result.data else f"Player_{request.player_id[:8]}"
-        
-        # Add player to room with username
-        room["players"].append({
-            "id": request.player_id,
-            "username": username
-        })
-        player_sessions[request.player_id] = request.room_id
-        
-        # Build usernames mapping for all players
-        usernames = {p["id"]: p["username"] for p in room["players"]}
-        
-        print(f"✅ Player joined. Room now has: {[p['username'] for p in room['players']]}")
+        if len(room["players"]) >= MAX_ROOM_PLAYERS:
+            return RoomResponse(success=False, error=f"Room full (max {MAX_ROOM_PLAYERS} players)")
+        
+        username = await _fetch_username(request.player_id)
+        
+        # Re-check under the room lock: other joins may have landed while we awaited
+        async with room_locks.lock(request.room_id):
+            room = rooms.get(request.room_id)
+            if room is None:
+                return RoomResponse(success=False, error="Room not found")
+            
+            if any(p["id"] == request.player_id for p in room["players"]):
+                return _room_response(room)
+            
+            if len(room["players"]) >= MAX_ROOM_PLAYERS:
+                return RoomResponse(success=False, error=f"Room full (max {MAX_ROOM_PLAYERS} players)")
+            
+            # Add player to room with username
+            _add_player(room, request.player_id, username)
+            response = _room_response(room)
+        
+        logger.info("join_room_done", player_id=request.player_id, room_id=request.room_id, players=len(response.players))
+        
+        return response
         
+    except Exception as e:
+        logger.exception("join_room_failed", player_id=request.player_id, room_id=request.room_id)
         return RoomResponse(
-            success=True,
-            room_id=request.room_id,
-            photon_room=f"brick_{request.room_id}",
-            players=[p["id"] for p in room["players"]],
-            usernames=usernames
+            success=False,
+            error=f"Server error: {str(e)}"
         )
+
+@router.post("/matchmake", response_model=RoomResponse)
+async def matchmake(request: MatchmakeRequest):
+    """Quick-play: join the fullest open room, or a new one if none are open"""
+    try:
+        room_id = await matchmaker.enqueue(request.player_id)
+        
+        room = rooms.get(room_id)
+        if room is None:
+            return RoomResponse(success=False, error="Room closed, try again")
+        
+        return _room_response(room)
         
+    except asyncio.TimeoutError:
+        return RoomResponse(success=False, error="Matchmaking timed out, try again")
     except Exception as e:
-        print(f"❌ Error joining room: {e}")
+        logger.exception("matchmake_failed", player_id=request.player_id)
         return RoomResponse(
             success=False,
             error=f"Server error: {str(e)}"
@@ -154,5 +245,5 @@ async def get_room(room_id: str):
         }
         
     except Exception as e:
-        print(f"❌ Error getting room: {e}")
+        logger.exception("get_room_failed", room_id=room_id)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
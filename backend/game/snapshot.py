@@ -0,0 +1,248 @@
+# game/snapshot.py
+import asyncio
+import contextlib
+import gc
+import glob
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from logger.structured import get_logger
+
+logger = get_logger("game.snapshot")
+
+# Settings (point ROOM_SNAPSHOT_DIR at a persistent volume; empty disables)
+SNAPSHOT_DIR = os.getenv("ROOM_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_INTERVAL = float(os.getenv("ROOM_SNAPSHOT_INTERVAL", "60"))  # full snapshot
+FLUSH_INTERVAL = float(os.getenv("ROOM_LOG_FLUSH_INTERVAL", "1"))  # change log
+
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct("<I")
+
+class RoomStore:
+    """
+    Persists `rooms` as a full snapshot plus an append-only change log.
+
+    Files (one generation at a time):
+        rooms.snap        pickle of {"version", "generation", "rooms"}
+        rooms.<gen>.log   length-prefixed pickled {room_id: room | None}
+                          batches written since snapshot <gen>
+
+    Writers call mark(room_id) after changing a room; flush() appends the
+    current state of every marked room (None if it was deleted), and
+    snapshot() rewrites everything and starts a new generation. A log is
+    only replayed onto the snapshot of its own generation, so a crash
+    between the two steps never replays stale changes. The generation only
+    advances once the new snapshot is on disk; if a write fails, its rooms
+    are marked dirty again and go to the current log. Only load files
+    this server wrote: they are unpickled.
+    """
+
+    def __init__(self, rooms: Dict[str, Dict], directory: str = SNAPSHOT_DIR):
+        self.rooms = rooms
+        self.directory = directory
+        self.enabled = bool(directory)
+        self.generation = 0
+        self.dirty: Set[str] = set()
+        self.logged = False  # change log written since the last snapshot
+        self.last_snapshot = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        # Writes run on worker threads and a cancelled one may still be
+        # pending, so writes are serialized and stale snapshots skipped
+        self._write_lock = threading.Lock()
+        self._issued = 0  # highest generation handed to a snapshot write
+        self._on_disk = 0  # highest generation this process wrote
+
+    # ---- paths ----
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, "rooms.snap")
+
+    def log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"rooms.{generation}.log")
+
+    def mark(self, room_id: str):
+        """Record that a room changed (or was removed) since the last flush"""
+        if self.enabled:
+            self.dirty.add(room_id)
+
+    # ---- restore ----
+    def restore(self) -> int:
+        """Load the latest snapshot and replay its change log into `rooms`"""
+        if not self.enabled:
+            return 0
+        start = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Unpickling builds lots of small dicts; cyclic GC passes over them
+        # would otherwise dominate load time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                with open(self.snapshot_path, "rb") as f:
+                    snapshot = pickle.load(f)
+                if snapshot.get("version") == FORMAT_VERSION:
+                    self.generation = snapshot["generation"]
+                    self.rooms.update(snapshot["rooms"])
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logger.exception("snapshot_load_failed", path=self.snapshot_path)
+
+            replayed = self._replay(self.log_path(self.generation))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        logger.info("rooms_restored", rooms=len(self.rooms), generation=self.generation,
+                    log_batches=replayed, ms=round((time.perf_counter() - start) * 1000, 2))
+        return len(self.rooms)
+
+    def _replay(self, path: str) -> int:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+
+        batches = 0
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            if offset + length > len(data):
+                break  # torn write at the tail
+            try:
+                changes = pickle.loads(data[offset:offset + length])
+            except Exception:
+                break
+            offset += length
+            for room_id, room in changes.items():
+                if room is None:
+                    self.rooms.pop(room_id, None)
+                else:
+                    self.rooms[room_id] = room
+            batches += 1
+        return batches
+
+    # ---- write ----
+    def _collect_changes(self) -> Tuple[Set[str], Optional[bytes]]:
+        if not self.dirty:
+            return set(), None
+        dirty, self.dirty = self.dirty, set()
+        changes = {room_id: self.rooms.get(room_id) for room_id in dirty}
+        payload = pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL)
+        return dirty, _LENGTH.pack(len(payload)) + payload
+
+    def _append(self, generation: int, record: bytes):
+        with self._write_lock:
+            with open(self.log_path(generation), "ab") as f:
+                f.write(record)
+            self.logged = True
+
+    def _collect_snapshot(self) -> Tuple[int, Set[str], bytes]:
+        """Pickle every room for the next generation (state advances in _snapshot_written)"""
+        self._issued = generation = max(self._issued, self.generation) + 1
+        dirty, self.dirty = self.dirty, set()
+        payload = pickle.dumps(
+            {"version": FORMAT_VERSION, "generation": generation, "rooms": self.rooms},
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+        return generation, dirty, payload
+
+    def _snapshot_written(self, generation: int):
+        # Rooms marked while the file was written stay dirty for the new log
+        self.generation = generation
+        self.logged = False
+        self.last_snapshot = time.monotonic()
+
+    def _write_snapshot(self, generation: int, payload: bytes):
+        with self._write_lock:
+            if generation <= self._on_disk:
+                return  # a newer snapshot already replaced this one
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._on_disk = generation
+            # Older generations' logs are now obsolete (and never replayed)
+            for path in glob.glob(os.path.join(self.directory, "rooms.*.log")):
+                if path != self.log_path(generation):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        logger.warning("snapshot_log_cleanup_failed", path=path)
+
+    def flush(self):
+        """Append pending changes to the log (blocking)"""
+        dirty, record = self._collect_changes()
+        if record is not None:
+            try:
+                self._append(self.generation, record)
+            except BaseException:
+                self.dirty |= dirty
+                raise
+
+    def snapshot(self):
+        """Write a full snapshot and start a new generation (blocking)"""
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        generation, dirty, payload = self._collect_snapshot()
+        try:
+            self._write_snapshot(generation, payload)
+        except BaseException:
+            self.dirty |= dirty
+            raise
+        self._snapshot_written(generation)
+
+    async def _run(self):
+        """
+        Background loop. Rooms are pickled on the event loop (so the copy
+        is consistent) and written to disk on a worker thread.
+        """
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                changed = self.dirty or self.logged
+                if changed and time.monotonic() - self.last_snapshot >= SNAPSHOT_INTERVAL:
+                    generation, dirty, payload = self._collect_snapshot()
+                    try:
+                        await asyncio.to_thread(self._write_snapshot, generation, payload)
+                    except BaseException:
+                        self.dirty |= dirty
+                        raise
+                    self._snapshot_written(generation)
+                else:
+                    dirty, record = self._collect_changes()
+                    if record is not None:
+                        try:
+                            await asyncio.to_thread(self._append, self.generation, record)
+                        except BaseException:
+                            self.dirty |= dirty
+                            raise
+            except Exception:
+                logger.exception("snapshot_write_failed", directory=self.directory)
+
+    async def start(self):
+        """Start periodic flushes and snapshots"""
+        if self.enabled and (self._task is None or self._task.done()):
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background loop and write a final snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            self.snapshot()
+        except Exception:
+            logger.exception("snapshot_write_failed", directory=self.directory)
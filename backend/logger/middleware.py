@@ -0,0 +1,32 @@
+# backend/logger/middleware.py
+import uuid
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .structured import request_id_var
+
+class RequestIdMiddleware:
+    """
+    Tag every log line for this request with a request id
+    (taken from X-Request-ID if the client sent one) and echo it back
+
+    Usage in main.py:
+        app.add_middleware(RequestIdMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex[:16]
+        request_id_var.set(request_id)
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
@@ -0,0 +1,139 @@
+# backend/logger/structured.py
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Settings
+MIN_LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "INFO").upper(), 20)
+INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))  # DEBUG/INFO only
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "request_id", default=None
+)
+
+_queue: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+dropped = 0  # records lost because the queue was full
+
+class StructuredLogger:
+    """
+    JSON-lines logger. Calling it only builds a tuple and enqueues it;
+    formatting and stdout I/O happen on a background writer thread.
+
+    Usage:
+        logger = get_logger("friends")
+        logger.info("friend_request_sent", request_id=request_id)
+        logger.exception("send_request_failed")  # inside except:
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _log(self, level: str, event: str, exc: Optional[BaseException], fields: dict):
+        levelno = LEVELS[level]
+        if levelno < MIN_LEVEL:
+            return
+        if levelno <= 20 and INFO_SAMPLE_RATE < 1.0 and random.random() >= INFO_SAMPLE_RATE:
+            return
+
+        try:
+            _queue.put_nowait((time.time(), level, self.name, request_id_var.get(), event, fields, exc))
+        except queue.Full:
+            global dropped
+            dropped += 1
+            return
+
+        if _writer is None:
+            _start_writer()
+
+    def debug(self, event: str, **fields):
+        self._log("DEBUG", event, None, fields)
+
+    def info(self, event: str, **fields):
+        self._log("INFO", event, None, fields)
+
+    def warning(self, event: str, **fields):
+        self._log("WARNING", event, None, fields)
+
+    def error(self, event: str, **fields):
+        self._log("ERROR", event, None, fields)
+
+    def exception(self, event: str, **fields):
+        """Log at ERROR with the exception currently being handled"""
+        self._log("ERROR", event, sys.exc_info()[1], fields)
+
+_loggers = {}
+
+def get_logger(name: str) -> StructuredLogger:
+    """Get (or create) the logger for a module"""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = StructuredLogger(name)
+    return logger
+
+def _format(record) -> str:
+    timestamp, level, name, request_id, event, fields, exc = record
+    entry = {
+        "ts": round(timestamp, 6),
+        "level": level,
+        "logger": name,
+        "event": event
+    }
+    if request_id:
+        entry["request_id"] = request_id
+    if INFO_SAMPLE_RATE < 1.0 and LEVELS[level] <= 20:
+        entry["sample_rate"] = INFO_SAMPLE_RATE
+    entry.update(fields)
+    if exc is not None:
+        entry["error"] = str(exc)
+        entry["traceback"] = "".join(traceback.format_exception(exc))
+    return json.dumps(entry, default=str)
+
+def _write_loop():
+    """Drain the queue to stdout, flushing once the queue runs dry"""
+    out = sys.stdout
+    while True:
+        record = _queue.get()
+        if record is _STOP:
+            out.flush()
+            return
+        try:
+            out.write(_format(record) + "\n")
+        except Exception:
+            pass
+        if _queue.empty():
+            out.flush()
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="log-writer", daemon=True)
+            _writer.start()
+
+@atexit.register
+def flush_logs(timeout: float = 2.0):
+    """Write out anything still queued (runs at interpreter exit)"""
+    global _writer
+    if _writer is None:
+        return
+    try:
+        _queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+        return
+    _writer.join(timeout)
+    _writer = None
@@ -5,10 +5,22 @@ import os
 
 # Import routers
 from auth.routes import router as auth_router
-from game.routes import router as game_router
+from game.routes import router as game_router, restore_rooms, room_store
+from game.cleanup import start_cleanup_task
+from metrics.routes import router as metrics_router
+from metrics.middleware import MetricsMiddleware
+from metrics.lag import start_lag_sampler
+from metrics.profiler import ProfilingMiddleware
+from db.middleware import QueryAccountingMiddleware
+from logger.middleware import RequestIdMiddleware
+from ratelimit.shedder import LoadShedMiddleware
 
 app = FastAPI(title="Bricktopia API", version="0.1.0")
 
+# Shed expensive requests early when the worker is overloaded
+# (added before CORS so 503s still carry CORS headers)
+app.add_middleware(LoadShedMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -18,10 +30,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request Supabase query accounting (Server-Timing header)
+app.add_middleware(QueryAccountingMiddleware)
+
+# Route latency histograms and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in stack sampling profiler (PROFILE_SAMPLE_RATE / PROFILE_ROUTES / X-Profile)
+app.add_middleware(ProfilingMiddleware)
+
+# Request id for structured logs (X-Request-ID)
+app.add_middleware(RequestIdMiddleware)
+
 # Mount routers with prefixes
 app.include_router(auth_router, prefix="/auth")
 app.include_router(game_router, prefix="/game")
 app.include_router(friends_router, prefix="/friends")
+app.include_router(metrics_router, prefix="/metrics")
+
+@app.on_event("startup")
+async def startup():
+    # Warm restart: bring back rooms from the last snapshot before serving
+    restore_rooms()
+    await room_store.start()
+    await start_cleanup_task()
+    await start_lag_sampler()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await room_store.stop()
 
 # Root endpoint
 @app.get("/")
@@ -38,6 +75,7 @@ async def root():
             "game": {
                 "create_room": "POST /game/create-room",
                 "join_room": "POST /game/join-room",
+                "matchmake": "POST /game/matchmake",
                 "room_info": "GET /game/room/{id}"
             },
             "friends": {
@@ -47,6 +85,11 @@ async def root():
                 "list": "GET /friends/list",
                 "requests": "GET /friends/requests",
                 "test": "GET /friends/test"
+            },
+            "metrics": {
+                "prometheus": "GET /metrics",
+                "queries": "GET /metrics/queries",
+                "profile": "GET /metrics/profile (admin)"
             }
         },
         "status": "online"
@@ -0,0 +1,84 @@
+# backend/metrics/collectors.py
+from collections import Counter as Tally
+from typing import Iterable
+from db import accounting
+from game import routes as game_routes
+from logger import structured as structured_log
+from .registry import Counter, register_collector
+
+# Caches report lookups here: cache_requests.inc("<cache name>", "hit" | "miss")
+cache_requests = Counter(
+    "bricktopia_cache_requests_total",
+    "Cache lookups by result",
+    ("cache", "result")
+)
+
+@register_collector
+def collect_rooms() -> Iterable[str]:
+    """Room count and player distribution from game.routes"""
+    rooms = game_routes.rooms
+    yield "# HELP bricktopia_rooms Active game rooms"
+    yield "# TYPE bricktopia_rooms gauge"
+    yield f"bricktopia_rooms {len(rooms)}"
+
+    yield "# HELP bricktopia_room_players Players in game rooms"
+    yield "# TYPE bricktopia_room_players gauge"
+    yield f"bricktopia_room_players {len(game_routes.player_sessions)}"
+
+    yield "# HELP bricktopia_open_rooms Public rooms with a free slot (quick-play index)"
+    yield "# TYPE bricktopia_open_rooms gauge"
+    yield f"bricktopia_open_rooms {len(game_routes.open_rooms)}"
+
+    yield "# HELP bricktopia_matchmaking_waiting Players waiting for the next matchmaking tick"
+    yield "# TYPE bricktopia_matchmaking_waiting gauge"
+    yield f"bricktopia_matchmaking_waiting {len(game_routes.matchmaker.waiting)}"
+
+    by_size = Tally(len(room["players"]) for room in list(rooms.values()))
+    yield "# HELP bricktopia_rooms_by_players Rooms grouped by number of players"
+    yield "# TYPE bricktopia_rooms_by_players gauge"
+    for size, count in sorted(by_size.items()):
+        yield f'bricktopia_rooms_by_players{{players="{size}"}} {count}'
+
+@register_collector
+def collect_cache_ratio() -> Iterable[str]:
+    """Hit ratio per cache, derived from cache_requests"""
+    totals = {}
+    for (cache, result), value in cache_requests.values.items():
+        hits_misses = totals.setdefault(cache, [0.0, 0.0])
+        hits_misses[0 if result == "hit" else 1] += value
+    yield "# HELP bricktopia_cache_hit_ratio Cache hits / lookups since startup"
+    yield "# TYPE bricktopia_cache_hit_ratio gauge"
+    for cache, (hits, misses) in totals.items():
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        yield f'bricktopia_cache_hit_ratio{{cache="{cache}"}} {ratio:.4f}'
+
+@register_collector
+def collect_db() -> Iterable[str]:
+    """Supabase query totals per route and table from db.accounting"""
+    yield "# HELP bricktopia_db_queries_total Supabase queries issued"
+    yield "# TYPE bricktopia_db_queries_total counter"
+    for route, totals in list(accounting.route_totals.items()):
+        for table, table_totals in totals["tables"].items():
+            yield f'bricktopia_db_queries_total{{route="{route}",table="{table}"}} {table_totals["queries"]}'
+
+    yield "# HELP bricktopia_db_query_seconds_total Upstream time spent in Supabase queries"
+    yield "# TYPE bricktopia_db_query_seconds_total counter"
+    for route, totals in list(accounting.route_totals.items()):
+        for table, table_totals in totals["tables"].items():
+            yield f'bricktopia_db_query_seconds_total{{route="{route}",table="{table}"}} {table_totals["seconds"]:.6f}'
+
+    yield "# HELP bricktopia_db_in_flight Supabase calls in progress"
+    yield "# TYPE bricktopia_db_in_flight gauge"
+    yield f"bricktopia_db_in_flight {accounting.in_flight()}"
+
+    yield "# HELP bricktopia_db_over_budget_total Requests over the query budget"
+    yield "# TYPE bricktopia_db_over_budget_total counter"
+    for route, totals in list(accounting.route_totals.items()):
+        yield f'bricktopia_db_over_budget_total{{route="{route}"}} {totals["over_budget"]}'
+
+@register_collector
+def collect_logging() -> Iterable[str]:
+    """Log records dropped because the writer queue was full"""
+    yield "# HELP bricktopia_log_dropped_total Log records dropped (queue full)"
+    yield "# TYPE bricktopia_log_dropped_total counter"
+    yield f"bricktopia_log_dropped_total {structured_log.dropped}"
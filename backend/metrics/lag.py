@@ -0,0 +1,39 @@
+# backend/metrics/lag.py
+import asyncio
+import os
+from .registry import Gauge, Histogram
+
+# How often to wake up and measure scheduling delay (seconds)
+LAG_SAMPLE_INTERVAL = float(os.getenv("LOOP_LAG_SAMPLE_INTERVAL", "0.5"))
+
+loop_lag = Gauge(
+    "bricktopia_event_loop_lag_seconds",
+    "Most recent event loop scheduling delay"
+)
+loop_lag_histogram = Histogram(
+    "bricktopia_event_loop_lag_histogram_seconds",
+    "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+_task = None
+
+async def sample_loop_lag():
+    """Background task: measure how late the loop wakes us up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_SAMPLE_INTERVAL
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+        lag = max(0.0, loop.time() - expected)
+        loop_lag.set(lag)
+        loop_lag_histogram.observe(lag)
+
+def current_lag() -> float:
+    """Latest measured event loop lag in seconds"""
+    return loop_lag.get()
+
+async def start_lag_sampler():
+    """Start the lag sampler task"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(sample_loop_lag())
@@ -0,0 +1,55 @@
+# backend/metrics/middleware.py
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .registry import Counter, Gauge, Histogram
+from .utils import route_label
+
+requests_total = Counter(
+    "bricktopia_http_requests_total",
+    "HTTP requests handled",
+    ("method", "route", "status")
+)
+request_duration = Histogram(
+    "bricktopia_http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route")
+)
+requests_in_flight = Gauge(
+    "bricktopia_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+
+class MetricsMiddleware:
+    """
+    Record per-route request counts, latency and in-flight requests
+
+    Usage in main.py:
+        app.add_middleware(MetricsMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec()
+            route = route_label(scope)
+            requests_total.inc(scope["method"], route, str(status))
+            request_duration.observe(elapsed, scope["method"], route)
@@ -0,0 +1,192 @@
+# backend/metrics/profiler.py
+import asyncio
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from auth.utils import ADMIN_TOKEN
+from .utils import route_label
+
+# Settings (all off by default)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # fraction of requests
+PROFILE_ROUTES = [p for p in os.getenv("PROFILE_ROUTES", "").split(",") if p]  # path prefixes
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "2")) / 1000
+
+MAX_DEPTH = 64
+MAX_STACKS_PER_ROUTE = 5000
+
+# ADMIN_TOKEN also enables profiling single requests with "X-Profile: <token>"
+ENABLED = bool(PROFILE_SAMPLE_RATE > 0 or PROFILE_ROUTES or ADMIN_TOKEN)
+
+class StackSampler:
+    """
+    Samples one profiled request's task from a background thread while it
+    is in flight (one request at a time). While the task runs, the event
+    loop thread's Python stack is recorded; while it is suspended (e.g.
+    awaiting a Supabase call on a worker thread), its coroutine await
+    chain is, so waiting time is charged to the line that awaits. Read
+    the samples as wall-clock time.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._target: Optional[int] = None  # event loop thread id
+        self._task: Optional[asyncio.Task] = None
+        self._samples: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, task: asyncio.Task) -> bool:
+        """Start sampling `task` (called on its loop). False if a session is already running."""
+        with self._lock:
+            if self._target is not None:
+                return False
+            self._samples = {}
+            self._target = threading.get_ident()
+            self._task = task
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return True
+
+    def end(self) -> Dict[str, int]:
+        """Stop sampling and return folded stack → sample count"""
+        with self._lock:
+            self._target = None
+            self._task = None
+            samples, self._samples = self._samples, {}
+        self._wake.clear()
+        return samples
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if self._target is not None:
+                    stack = _sample(self._task, self._target)
+                    if stack:
+                        self._samples[stack] = self._samples.get(stack, 0) + 1
+            time.sleep(self.interval)
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def _sample(task: asyncio.Task, thread_id: int) -> str:
+    """
+    Folded stack for the task: the running frames if the task is on the
+    loop thread right now, else the chain of awaits it is suspended in.
+    Runs off the loop thread; attributes are only read (under the GIL).
+    """
+    coro = task.get_coro()
+    root = getattr(coro, "cr_frame", None)
+    if root is None:
+        return ""  # finished
+    if coro.cr_running:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            return _fold(frame, root)
+
+    names: List[str] = []
+    awaiting = coro
+    while len(names) < MAX_DEPTH:
+        if isinstance(awaiting, asyncio.Task):
+            awaiting = awaiting.get_coro()  # follow into awaited tasks
+        frame = getattr(awaiting, "cr_frame", None) or getattr(awaiting, "gi_frame", None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        awaiting = getattr(awaiting, "cr_await", None) or getattr(awaiting, "gi_yieldfrom", None)
+    if awaiting is not None:
+        # A future (e.g. a worker thread's result); awaiting one goes through its iterator
+        kind = type(awaiting).__name__
+        names.append(f"<await {'Future' if kind == 'FutureIter' else kind}>")
+    return ";".join(names)
+
+def _fold(frame, root) -> str:
+    """Frame chain → 'outer;...;inner' (flamegraph.pl collapsed format), from `root` down"""
+    names: List[str] = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+sampler = StackSampler(PROFILE_INTERVAL)
+
+# route → {"requests": n, "stacks": {folded stack: samples}}
+profiles: Dict[str, Dict] = {}
+
+def record(route: str, samples: Dict[str, int]):
+    profile = profiles.get(route)
+    if profile is None:
+        profile = profiles[route] = {"requests": 0, "stacks": {}}
+    profile["requests"] += 1
+    stacks = profile["stacks"]
+    for stack, count in samples.items():
+        if stack in stacks:
+            stacks[stack] += count
+        elif len(stacks) < MAX_STACKS_PER_ROUTE:
+            stacks[stack] = count
+
+def folded(route: str) -> str:
+    """Collapsed stacks for one route, ready for flamegraph.pl / speedscope"""
+    profile = profiles.get(route)
+    if profile is None:
+        return ""
+    return "\n".join(f"{stack} {count}" for stack, count in profile["stacks"].items())
+
+def summary() -> Dict:
+    return {
+        route: {
+            "requests": profile["requests"],
+            "samples": sum(profile["stacks"].values()),
+            "folded": folded(route)
+        }
+        for route, profile in profiles.items()
+    }
+
+def reset():
+    profiles.clear()
+
+def should_profile(scope: Scope) -> bool:
+    token = Headers(scope=scope).get("x-profile")
+    if ADMIN_TOKEN and token and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return True
+    path = scope["path"]
+    for prefix in PROFILE_ROUTES:
+        if path.startswith(prefix):
+            return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    """
+    Stack-sample a fraction of requests (PROFILE_SAMPLE_RATE), requests
+    under PROFILE_ROUTES, or requests sent with "X-Profile: <ADMIN_TOKEN>"
+
+    Usage in main.py:
+        app.add_middleware(ProfilingMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (not ENABLED or scope["type"] != "http"
+                or not should_profile(scope) or not sampler.begin(asyncio.current_task())):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            record(route_label(scope), sampler.end())
@@ -0,0 +1,41 @@
+# backend/metrics/routes.py
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from auth.middleware import require_admin
+from db import accounting
+from . import collectors  # registers scrape-time collectors
+from . import profiler
+from .registry import render
+
+router = APIRouter()
+
+@router.get("", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of all metrics"""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/queries")
+async def query_metrics():
+    """Supabase query counts and upstream time per route and table"""
+    return accounting.snapshot()
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def get_profiles(route: Optional[str] = None):
+    """
+    Sampled stacks per route. With ?route=/friends/list returns the
+    collapsed stacks as text (pipe into flamegraph.pl or load in speedscope)
+    """
+    if route is not None:
+        return PlainTextResponse(profiler.folded(route))
+    return {
+        "enabled": profiler.ENABLED,
+        "sample_rate": profiler.PROFILE_SAMPLE_RATE,
+        "routes": profiler.summary()
+    }
+
+@router.delete("/profile", dependencies=[Depends(require_admin)])
+async def reset_profiles():
+    """Drop collected profiles"""
+    profiler.reset()
+    return {"success": True}
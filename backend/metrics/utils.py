@@ -0,0 +1,9 @@
+# backend/metrics/utils.py
+from starlette.types import Scope
+
+def route_label(scope: Scope) -> str:
+    """Route template for a handled request (e.g. /game/room/{room_id})"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "unmatched"
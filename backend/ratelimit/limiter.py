@@ -0,0 +1,141 @@
+# backend/ratelimit/limiter.py
+import math
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+from fastapi import Depends, HTTPException, Request
+from auth.middleware import get_current_user
+from metrics.registry import Counter
+
+# Per-route budgets: name → (tokens per second, burst)
+ROUTE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "signup": (0.2, 5),
+    "login": (1.0, 10),
+    "friends_list": (2.0, 10),
+    "friends_send_request": (0.5, 10)
+}
+
+# Override with e.g. RATE_LIMITS="login=2:20,signup=0.5:5"
+for _entry in filter(None, os.getenv("RATE_LIMITS", "").split(",")):
+    _name, _budget = _entry.split("=")
+    _rate, _burst = _budget.split(":")
+    ROUTE_LIMITS[_name.strip()] = (float(_rate), float(_burst))
+
+MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # per route
+
+# Proxies in front of us that append to X-Forwarded-For (Railway's edge = 1).
+# Only the entry the outermost trusted proxy appended is used; anything
+# earlier in the header was sent by the client and can be forged.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+rate_limited = Counter(
+    "bricktopia_rate_limited_total",
+    "Requests rejected by the per-client rate limiter",
+    ("limit",)
+)
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key (user id or client IP). Buckets refill
+    lazily on access, so there is no background work. When the table
+    reaches MAX_KEYS, full buckets are pruned and then the least recently
+    used ones are evicted, so a flood of new keys can't reset active ones.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: Dict[str, List[float]] = {}  # key → [tokens, last update]
+
+    def acquire(self, key: str) -> float:
+        """Take a token. Returns 0 if allowed, else seconds until one is free."""
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self.buckets[key] = [self.burst, now]
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    def _prune(self, now: float):
+        """Drop refilled buckets (they carry no state), then the oldest ones"""
+        refill_time = self.burst / self.rate
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items()
+            if now - bucket[1] < refill_time
+        }
+        if len(self.buckets) >= self.max_keys:
+            # Keep the most recently used 90%
+            keep = int(self.max_keys * 0.9)
+            newest = sorted(self.buckets.items(), key=lambda item: item[1][1])[-keep:]
+            self.buckets = dict(newest)
+
+_limiters: Dict[str, TokenBucketLimiter] = {}
+
+def _limiter(name: str) -> TokenBucketLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        rate, burst = ROUTE_LIMITS[name]
+        limiter = _limiters[name] = TokenBucketLimiter(rate, burst)
+    return limiter
+
+def reset():
+    """Forget every client's bucket (the benchmarks start each scenario fresh)"""
+    for limiter in _limiters.values():
+        limiter.buckets.clear()
+
+def _check(limiter: TokenBucketLimiter, name: str, key: str):
+    wait = limiter.acquire(key)
+    if wait > 0:
+        rate_limited.inc(name)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+def client_ip(request: Request) -> str:
+    """Client address as seen by the outermost trusted proxy"""
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.split(",")]
+            if len(hops) >= TRUSTED_PROXY_HOPS:
+                return hops[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+def limit_by_ip(name: str) -> Callable:
+    """
+    Rate limit an unauthenticated route by client IP
+
+    Usage in routes:
+        @router.post("/signup", dependencies=[Depends(limit_by_ip("signup"))])
+    """
+    limiter = _limiter(name)
+
+    async def dependency(request: Request):
+        _check(limiter, name, client_ip(request))
+
+    return dependency
+
+def limit_by_user(name: str) -> Callable:
+    """
+    Rate limit an authenticated route by user id (reuses get_current_user)
+
+    Usage in routes:
+        @router.get("/list", dependencies=[Depends(limit_by_user("friends_list"))])
+    """
+    limiter = _limiter(name)
+
+    async def dependency(current_user: dict = Depends(get_current_user)):
+        _check(limiter, name, current_user["user_id"])
+
+    return dependency
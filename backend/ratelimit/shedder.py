@@ -0,0 +1,71 @@
+# backend/ratelimit/shedder.py
+import json
+import os
+import random
+from starlette.types import ASGIApp, Receive, Scope, Send
+from db.accounting import in_flight
+from metrics.lag import current_lag
+from metrics.registry import Counter
+
+# Settings: shedding starts (10%) at the threshold and reaches 100% at ~2x it
+SHED_LOOP_LAG = float(os.getenv("SHED_LOOP_LAG_MS", "200")) / 1000
+SHED_DB_IN_FLIGHT = int(os.getenv("SHED_DB_IN_FLIGHT", "16"))
+
+# Endpoints that fan out into several Supabase queries
+SHED_PATHS = {
+    "/auth/signup",
+    "/auth/login",
+    "/friends/list",
+    "/friends/requests",
+    "/friends/send-request"
+}
+
+shed_total = Counter(
+    "bricktopia_shed_total",
+    "Requests rejected early because the worker was overloaded",
+    ("path", "reason")
+)
+
+def _overload() -> tuple:
+    """(how far past the threshold, reason); 1.0 = at threshold, 2.0 = double"""
+    lag_ratio = current_lag() / SHED_LOOP_LAG if SHED_LOOP_LAG > 0 else 0.0
+    db_ratio = in_flight() / SHED_DB_IN_FLIGHT if SHED_DB_IN_FLIGHT > 0 else 0.0
+    if lag_ratio >= db_ratio:
+        return lag_ratio, "loop_lag"
+    return db_ratio, "db_in_flight"
+
+class LoadShedMiddleware:
+    """
+    Reject expensive requests with 503 before they start, with a
+    probability that grows as event loop lag or in-flight Supabase calls
+    go past their thresholds. Cheap routes (rooms, health, metrics) are
+    never shed.
+
+    Usage in main.py:
+        app.add_middleware(LoadShedMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] in SHED_PATHS:
+            ratio, reason = _overload()
+            if ratio >= 1.0 and random.random() < ratio - 1.0 + 0.1:
+                shed_total.inc(scope["path"], reason)
+                await _reject(send)
+                return
+        await self.app(scope, receive, send)
+
+async def _reject(send: Send):
+    body = json.dumps({"success": False, "detail": "Server busy, try again shortly"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", b"1")
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})